@@ -29,11 +29,58 @@ if sys.platform == 'win32':
 
 __version__ = "0.4.6"
 
+# Azure DevOps URL formats, compiled once at import and tried in order of how
+# often they appear in manifests. Each captures (org, project, repo).
+_ADO_URL_PATTERNS = (
+    # SSH format - git@ssh.dev.azure.com:v3/{org}/{project}/{repo}
+    re.compile(r'^git@ssh\.dev\.azure\.com:v3/([^/]+)/([^/]+)/(.+)$', re.ASCII),
+    # HTTPS format - https://[user@]dev.azure.com/{org}/{project}/_git/{repo}
+    re.compile(r'^https://(?:[^@]+@)?dev\.azure\.com/([^/]+)/([^/]+)/_git/(.+)$', re.ASCII),
+    # Shorthand with /_git/ - dev.azure.com/{org}/{project}/_git/{repo}
+    re.compile(r'^dev\.azure\.com/([^/]+)/([^/]+)/_git/(.+)$', re.ASCII),
+    # Shorthand without /_git/ - dev.azure.com/{org}/{project}/{repo}
+    re.compile(r'^dev\.azure\.com/([^/]+)/([^/]+)/([^/]+)$', re.ASCII),
+    # Malformed hybrid - dev.azure.com:v3/{org}/{project}/{repo}
+    # This is a common mistake mixing HTTPS domain with SSH path style
+    re.compile(r'^dev\.azure\.com:v3/([^/]+)/([^/]+)/(.+)$', re.ASCII),
+)
+
+# Azure DevOps URL templates keyed by (protocol, has_token)
+_ADO_URL_TEMPLATES = {
+    ('ssh', False): "git@ssh.dev.azure.com:v3/{org}/{project}/{repo}",
+    ('https', False): "https://dev.azure.com/{org}/{project}/_git/{repo}",
+    ('https', True): "https://{token}@dev.azure.com/{org}/{project}/_git/{repo}",
+}
+
+# Project names made only of these characters need no escaping beyond spaces
+_ADO_PLAIN_NAME_RE = re.compile(r'[A-Za-z0-9_.~ -]*\Z', re.ASCII)
+
+
+def _ado_unquote(value):
+    """Decode an Azure DevOps URL component (usually only spaces are encoded)"""
+    if '%' not in value:
+        return value
+    value = value.replace('%20', ' ')
+    if '%' in value:
+        value = urllib.parse.unquote(value)
+    return value
+
+
+def _ado_quote(value):
+    """Encode an Azure DevOps project name for use in an HTTPS URL path"""
+    if _ADO_PLAIN_NAME_RE.match(value):
+        return value.replace(' ', '%20')
+    return urllib.parse.quote(value, safe='')
+
 
 class GitPM:
-    def __init__(self):
-        # Find project root by looking for git-pm.json
-        self.project_root = self._find_project_root()
+    def __init__(self, project_root=None):
+        # Use the given project root, or find it by looking for git-pm.json
+        self.project_root_given = project_root is not None
+        if self.project_root_given:
+            self.project_root = Path(project_root).resolve()
+        else:
+            self.project_root = self._find_project_root()
         
         self.config = self.load_config()
         self.manifest_file = self.project_root / "git-pm.json"
@@ -195,7 +242,8 @@ class GitPM:
         """Check if a repository URL is a local file path"""
         return repo_url.startswith("file://")
     
-    def _parse_azure_devops_url(self, repo):
+    @staticmethod
+    def _parse_azure_devops_url(repo):
         """
         Parse any Azure DevOps URL format and extract org, project, repo.
         
@@ -208,42 +256,21 @@ class GitPM:
         
         Returns: (org, project, repo) tuple or None if not an Azure DevOps URL
         """
+        # Most manifest entries are not Azure DevOps - reject them before any regex work
+        if 'dev.azure.com' not in repo:
+            return None
+        
         # Normalize: remove .git suffix if present
         repo = repo.rstrip('/')
         if repo.endswith('.git'):
             repo = repo[:-4]
         
-        # Pattern 1: SSH format - git@ssh.dev.azure.com:v3/{org}/{project}/{repo}
-        ssh_match = re.match(r'^git@ssh\.dev\.azure\.com:v3/([^/]+)/([^/]+)/(.+)$', repo)
-        if ssh_match:
-            org, project, repo_name = ssh_match.groups()
-            # SSH URLs may have URL-encoded project names, decode them for consistency
-            return (urllib.parse.unquote(org), urllib.parse.unquote(project), urllib.parse.unquote(repo_name))
-        
-        # Pattern 2: Malformed hybrid - dev.azure.com:v3/{org}/{project}/{repo}
-        # This is a common mistake mixing HTTPS domain with SSH path style
-        hybrid_match = re.match(r'^dev\.azure\.com:v3/([^/]+)/([^/]+)/(.+)$', repo)
-        if hybrid_match:
-            org, project, repo_name = hybrid_match.groups()
-            return (urllib.parse.unquote(org), urllib.parse.unquote(project), urllib.parse.unquote(repo_name))
-        
-        # Pattern 3: HTTPS format - https://[user@]dev.azure.com/{org}/{project}/_git/{repo}
-        https_match = re.match(r'^https://(?:[^@]+@)?dev\.azure\.com/([^/]+)/([^/]+)/_git/(.+)$', repo)
-        if https_match:
-            org, project, repo_name = https_match.groups()
-            return (urllib.parse.unquote(org), urllib.parse.unquote(project), urllib.parse.unquote(repo_name))
-        
-        # Pattern 4: Shorthand with /_git/ - dev.azure.com/{org}/{project}/_git/{repo}
-        shorthand_git_match = re.match(r'^dev\.azure\.com/([^/]+)/([^/]+)/_git/(.+)$', repo)
-        if shorthand_git_match:
-            org, project, repo_name = shorthand_git_match.groups()
-            return (urllib.parse.unquote(org), urllib.parse.unquote(project), urllib.parse.unquote(repo_name))
-        
-        # Pattern 5: Shorthand without /_git/ - dev.azure.com/{org}/{project}/{repo}
-        shorthand_match = re.match(r'^dev\.azure\.com/([^/]+)/([^/]+)/([^/]+)$', repo)
-        if shorthand_match:
-            org, project, repo_name = shorthand_match.groups()
-            return (urllib.parse.unquote(org), urllib.parse.unquote(project), urllib.parse.unquote(repo_name))
+        for pattern in _ADO_URL_PATTERNS:
+            match = pattern.match(repo)
+            if match:
+                org, project, repo_name = match.groups()
+                # URLs may have URL-encoded project names, decode them for consistency
+                return (_ado_unquote(org), _ado_unquote(project), _ado_unquote(repo_name))
         
         return None
 
@@ -252,7 +279,8 @@ class GitPM:
     # NEW METHOD: Add this to the GitPM class (after _parse_azure_devops_url)
     # ============================================================================
 
-    def _build_azure_devops_url(self, org, project, repo, protocol='https', token=None):
+    @staticmethod
+    def _build_azure_devops_url(org, project, repo, protocol='https', token=None):
         """
         Build Azure DevOps URL in the specified protocol.
         
@@ -268,13 +296,12 @@ class GitPM:
         Returns: Full URL string
         """
         if protocol == 'ssh':
-            return "git@ssh.dev.azure.com:v3/{}/{}/{}".format(org, project, repo)
-        else:
-            # HTTPS format - URL encode project name for spaces
-            project_encoded = urllib.parse.quote(project, safe='')
-            if token:
-                return "https://{}@dev.azure.com/{}/{}/_git/{}".format(token, org, project_encoded, repo)
-            return "https://dev.azure.com/{}/{}/_git/{}".format(org, project_encoded, repo)
+            # SSH URLs never carry a token
+            return _ADO_URL_TEMPLATES[('ssh', False)].format(org=org, project=project, repo=repo)
+        
+        # HTTPS format - URL encode project name for spaces
+        template = _ADO_URL_TEMPLATES[('https', bool(token))]
+        return template.format(org=org, project=_ado_quote(project), repo=repo, token=token)
 
     def _configure_azure_devops_auth(self):
         """
@@ -1574,10 +1601,10 @@ class GitPM:
         """Add a package to manifest"""
         print("📦 git-pm add")
         
-        # Determine where to create the manifest
+        # Determine where to create the manifest (a given project root always wins)
         cwd = Path.cwd()
         
-        if cwd == self.project_root or self.manifest_file.exists():
+        if self.project_root_given or cwd == self.project_root or self.manifest_file.exists():
             manifest_dir = self.project_root
         else:
             manifest_dir = cwd
@@ -1617,7 +1644,7 @@ class GitPM:
         return 0
 
 
-def main():
+def main(argv=None, project_root=None):
     parser = argparse.ArgumentParser(
         description="git-pm: Git Package Manager with dependency resolution",
         formatter_class=argparse.RawDescriptionHelpFormatter
@@ -1680,13 +1707,13 @@ def main():
     )
     add_parser.add_argument("--ref-value", default="main", help="Reference value")
     
-    args = parser.parse_args()
+    args = parser.parse_args(argv)
     
     if not args.command:
         parser.print_help()
         return 1
     
-    gpm = GitPM()
+    gpm = GitPM(project_root)
     
     if args.command == "install":
         return gpm.cmd_install(